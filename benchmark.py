@@ -0,0 +1,354 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Load-test suite for every endpoint. By default it seeds a throwaway SQLite database
+# (or --database-url, e.g. a local MySQL) and drives the app in-process, so query counts
+# per request can be measured as well:
+#
+#   python benchmark.py --customers 1000 --products 10000 --orders 20000 --output bench.json
+#   python benchmark.py --compare bench-before.json bench.json
+#
+# With --target it drives running servers over HTTP instead, e.g. sync vs async at 4 workers:
+#
+#   gunicorn -w 4 -b :8000 'ecomm_api:create_app()'
+#   uvicorn --factory ecomm_asgi:create_asgi_app --workers 4 --port 8001
+#   python benchmark.py --endpoints reads --target sync=http://localhost:8000 --target async=http://localhost:8001
+#
+# Every endpoint runs for --duration seconds at --concurrency. Deletes, exports and imports
+# are left out: they either consume the data under test or are measured by their own reports.
+
+
+def pick(limit):
+    return random.randint(1, limit)
+
+def order_body(volumes):
+    items = [{'product_id': pick(volumes['products']), 'quantity': random.randint(1, 3)} for _ in range(3)]
+    return {'customer_id': pick(volumes['customers']), 'date': date.today().isoformat(), 'items': items}
+
+def product_body(volumes):
+    return {'name': f"Benchmark product {random.random():.8f}", 'price': round(random.uniform(1, 500), 2),
+            'stock': 1000000}
+
+def customer_body(volumes):
+    return {'name': "Benchmark customer", 'email': "bench@example.com", 'phone': "5550100"}
+
+def account_body(volumes):
+    return {'customer_id': pick(volumes['customers']), 'username': f"bench-{uuid.uuid4().hex}", 'password': "benchmark"}
+
+# Bulk bodies carry BULK_ROWS rows, so req/s there is rows/s divided by BULK_ROWS
+BULK_ROWS = 100
+
+def product_rows(volumes):
+    return [product_body(volumes) for _ in range(BULK_ROWS)]
+
+def product_updates(volumes):
+    return [{'id': pick(volumes['products']), 'price': round(random.uniform(1, 500), 2)} for _ in range(BULK_ROWS)]
+
+def customer_rows(volumes):
+    return [customer_body(volumes) for _ in range(BULK_ROWS)]
+
+def customer_updates(volumes):
+    return [{'id': pick(volumes['customers']), 'phone': f"555{random.randint(0, 9999999):07d}"}
+            for _ in range(BULK_ROWS)]
+
+# name: (method, path, body); path and body take the seeded volumes
+ENDPOINTS = {
+    'add_customer': ('POST', lambda v: "/customers", customer_body),
+    'get_customer': ('GET', lambda v: f"/customers/{pick(v['customers'])}", None),
+    'update_customer': ('PUT', lambda v: f"/customers/{pick(v['customers'])}", customer_body),
+    'add_customers_bulk': ('POST', lambda v: "/customers/bulk", customer_rows),
+    'update_customers_bulk': ('PUT', lambda v: "/customers/bulk", customer_updates),
+    'add_customer_account': ('POST', lambda v: "/customer_accounts", account_body),
+    'get_customer_account': ('GET', lambda v: f"/customer_accounts/{pick(v['customers'])}", None),
+    'update_customer_account': ('PUT', lambda v: f"/customer_accounts/{pick(v['customers'])}", account_body),
+    'add_product': ('POST', lambda v: "/products", product_body),
+    'get_product': ('GET', lambda v: f"/products/{pick(v['products'])}", None),
+    'get_products': ('GET', lambda v: "/products?limit=50", None),
+    'get_products_by_price': ('GET', lambda v: "/products?limit=50&sort=price&order=desc&min_price=100&in_stock=true",
+                              None),
+    'search_products': ('GET', lambda v: f"/products/search?q=product+{pick(v['products'])}&limit=20", None),
+    'autocomplete_products': ('GET', lambda v: f"/products/autocomplete?q=prodcut+{str(pick(v['products']))[:2]}",
+                              None),
+    'update_product': ('PUT', lambda v: f"/products/{pick(v['products'])}", product_body),
+    'add_products_bulk': ('POST', lambda v: "/products/bulk", product_rows),
+    'update_products_bulk': ('PUT', lambda v: "/products/bulk", product_updates),
+    'update_stock': ('PUT', lambda v: f"/products/{pick(v['products'])}/stock", lambda v: {'delta': 1}),
+    'restock_products': ('POST', lambda v: "/products/restock", lambda v: {'threshold': 0, 'restock_amount': 1}),
+    'place_order': ('POST', lambda v: "/orders", order_body),
+    'get_order': ('GET', lambda v: f"/orders/{pick(v['orders'])}", None),
+    'track_order': ('GET', lambda v: f"/orders/{pick(v['orders'])}/status", None),
+    'get_order_history': ('GET', lambda v: f"/customers/{pick(v['customers'])}/orders", None),
+    'calculate_order_total': ('GET', lambda v: f"/orders/{pick(v['orders'])}/total", None),
+    'calculate_order_totals': ('POST', lambda v: "/orders/totals",
+                               lambda v: {'order_ids': [pick(v['orders']) for _ in range(100)]}),
+    'cancel_order': ('PUT', lambda v: f"/orders/{pick(v['orders'])}/cancel", None),
+}
+READ_ENDPOINTS = ['get_product', 'get_products', 'get_products_by_price', 'track_order', 'get_order_history']
+
+
+# Seed with executemany inserts in chunks; every product gets ample stock so orders succeed
+def seed(app, volumes, chunk_size=5000):
+    from ecomm_api import Customer, CustomerAccount, Order, OrderLine, Product, db
+
+    def insert(model, rows):
+        for start in range(0, len(rows), chunk_size):
+            db.session.execute(db.insert(model), rows[start:start + chunk_size])
+        db.session.commit()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        insert(Customer, [{'id': n, 'name': f"Customer {n}", 'email': f"customer{n}@example.com",
+                           'phone': f"555{n:07d}"[:15]} for n in range(1, volumes['customers'] + 1)])
+        insert(CustomerAccount, [{'id': n, 'username': f"customer{n}", 'password': "benchmark", 'customer_id': n}
+                                 for n in range(1, volumes['customers'] + 1)])
+        prices = {n: Decimal(random.randint(100, 50000)) / 100 for n in range(1, volumes['products'] + 1)}
+        insert(Product, [{'id': n, 'name': f"Product {n}", 'price': float(price), 'stock': 1000000}
+                         for n, price in prices.items()])
+        orders, lines = [], []
+        first_day = date.today() - timedelta(days=365)
+        for n in range(1, volumes['orders'] + 1):
+            basket = {pick(volumes['products']): random.randint(1, 3) for _ in range(3)}
+            orders.append({'id': n, 'customer_id': pick(volumes['customers']),
+                           'date': first_day + timedelta(days=random.randint(0, 365)),
+                           'total': sum(prices[product_id] * quantity for product_id, quantity in basket.items())})
+            lines.extend({'order_id': n, 'product_id': product_id, 'quantity': quantity,
+                          'unit_price': prices[product_id]} for product_id, quantity in basket.items())
+        insert(Order, orders)
+        insert(OrderLine, lines)
+
+
+# Counts statements per thread, so each in-process request knows how many queries it issued
+query_counter = threading.local()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    query_counter.count = getattr(query_counter, 'count', 0) + 1
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body):
+        before = getattr(query_counter, 'count', 0)
+        response = self.client.open(path, method=method, json=body)
+        response.close()
+        return response.status_code, getattr(query_counter, 'count', 0) - before
+
+    def close(self):
+        pass
+
+
+class HTTPClient:
+    def __init__(self, url):
+        self.target = urlsplit(url)
+        self.connection = self.connect()
+
+    def connect(self):
+        return http.client.HTTPConnection(self.target.hostname, self.target.port or 80, timeout=30)
+
+    def request(self, method, path, body):
+        try:
+            payload = None if body is None else json.dumps(body)
+            headers = {} if body is None else {'Content-Type': 'application/json'}
+            self.connection.request(method, path, payload, headers)
+            response = self.connection.getresponse()
+            response.read()
+            # The Flask app reports its query count in the Server-Timing header
+            match = re.search(r'queries;desc="(\d+)"', response.getheader('Server-Timing') or '')
+            return response.status, int(match.group(1)) if match else None
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = self.connect()
+            return 599, None
+
+    def close(self):
+        self.connection.close()
+
+
+def percentile_ms(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))] * 1000, 2)
+
+
+# Run one endpoint for `duration` seconds from `concurrency` threads, each with its own client
+def run_endpoint(make_client, endpoint, volumes, concurrency, duration):
+    method, path, body = ENDPOINTS[endpoint]
+    latencies, queries = [], []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        client = make_client()
+        local_latencies, local_queries, local_errors = [], [], 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status, query_count = client.request(method, path(volumes), body(volumes) if body else None)
+            elapsed = time.perf_counter() - started
+            if status >= 500:
+                local_errors += 1
+                continue
+            local_latencies.append(elapsed)
+            if query_count is not None:
+                local_queries.append(query_count)
+        client.close()
+        with lock:
+            latencies.extend(local_latencies)
+            queries.extend(local_queries)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': percentile_ms(latencies, 0.50),
+        'p95_ms': percentile_ms(latencies, 0.95),
+        'p99_ms': percentile_ms(latencies, 0.99),
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        'max_queries': max(queries) if queries else None,
+    }
+
+
+def print_table(results):
+    print(f"{'target':<10} {'endpoint':<24} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'queries':>8} {'errors':>7}")
+    for label, report in results.items():
+        for endpoint, stats in report.items():
+            print(f"{label:<10} {endpoint:<24} {stats['requests_per_second']:>9} {stats['p50_ms']!s:>8} "
+                  f"{stats['p95_ms']!s:>8} {stats['p99_ms']!s:>8} {stats['queries_per_request']!s:>8} "
+                  f"{stats['errors']:>7}")
+
+
+# Print throughput, p99 and query count changes between two saved runs
+def compare(baseline_path, current_path):
+    with open(baseline_path) as baseline_file, open(current_path) as current_file:
+        baseline, current = json.load(baseline_file), json.load(current_file)
+    print(f"{(baseline.get('commit') or baseline_path)[:12]} -> {(current.get('commit') or current_path)[:12]}")
+    print(f"{'target':<10} {'endpoint':<24} {'req/s':>18} {'p99 ms':>18} {'queries':>14}")
+    for label, report in current['results'].items():
+        for endpoint, stats in report.items():
+            before = baseline['results'].get(label, {}).get(endpoint)
+            if not before:
+                continue
+
+            def change(key):
+                old, new = before.get(key), stats.get(key)
+                if old is None or new is None:
+                    return f"{old} -> {new}"
+                percent = f" ({(new - old) / old * 100:+.0f}%)" if old else ""
+                return f"{old} -> {new}{percent}"
+            print(f"{label:<10} {endpoint:<24} {change('requests_per_second'):>18} {change('p99_ms'):>18} "
+                  f"{change('queries_per_request'):>14}")
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the e-commerce API")
+    parser.add_argument('--database-url', help="database to seed and test in-process; defaults to a temporary SQLite file")
+    parser.add_argument('--no-seed', action='store_true', help="reuse the data already in --database-url")
+    parser.add_argument('--reset', action='store_true',
+                        help="allow seeding --database-url, which drops and recreates every table in it")
+    parser.add_argument('--target', action='append', metavar='LABEL=URL',
+                        help="benchmark a running server over HTTP instead; repeat to compare several")
+    parser.add_argument('--endpoints', default='all',
+                        help="comma separated endpoint names, 'reads' or 'all' (default)")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10, help="seconds per endpoint")
+    parser.add_argument('--customers', type=int, default=1000)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="compare two JSON result files and exit")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    if args.endpoints == 'all':
+        endpoints = list(ENDPOINTS)
+    elif args.endpoints == 'reads':
+        endpoints = READ_ENDPOINTS
+    else:
+        endpoints = args.endpoints.split(',')
+    unknown = [endpoint for endpoint in endpoints if endpoint not in ENDPOINTS]
+    if unknown:
+        sys.exit(f"Unknown endpoints: {', '.join(unknown)}")
+    volumes = {'customers': args.customers, 'products': args.products, 'orders': args.orders}
+
+    targets = {}
+    if args.target:
+        for target in args.target:
+            label, _, url = target.partition('=')
+            targets[label] = lambda url=url: HTTPClient(url)
+    else:
+        from ecomm_api import create_app
+
+        if args.database_url and not args.no_seed and not args.reset:
+            sys.exit("Refusing to drop the tables in --database-url; pass --reset if that database is "
+                     "disposable, or --no-seed to use its data as it is")
+        database_url = args.database_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+        config = {'SQLALCHEMY_DATABASE_URI': database_url, 'LOG_LEVEL': 'WARNING',
+                  'DB_POOL_SIZE': args.concurrency, 'DB_MAX_OVERFLOW': 0}
+        if database_url.startswith('sqlite'):
+            config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 60}, 'pool_size': args.concurrency}
+        app = create_app(config)
+        if not args.no_seed:
+            started = time.perf_counter()
+            seed(app, volumes)
+            print(f"Seeded {volumes} in {time.perf_counter() - started:.1f}s")
+        targets['in-process'] = lambda: InProcessClient(app)
+
+    results = {label: {endpoint: run_endpoint(make_client, endpoint, volumes, args.concurrency, args.duration)
+                       for endpoint in endpoints}
+               for label, make_client in targets.items()}
+    print_table(results)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({'commit': current_commit(), 'timestamp': datetime.now().isoformat(timespec='seconds'),
+                       'concurrency': args.concurrency, 'duration': args.duration, 'volumes': volumes,
+                       'results': results}, output, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import logging
+import re
+import time
+import uuid
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.http import generate_etag, parse_etags
+
+from ecomm_api import (Customer, Order, Product, create_app, order_history_page, order_history_statement,
+                       order_status, product_schema, products_page, products_page_statement, request_log_level)
+
+# asyncio deployment mode: the read-heavy endpoints run as native coroutines on an async
+# engine, so a worker keeps serving while it waits on the database; every other route
+# is the regular Flask app behind an ASGI adapter.
+#
+#   uvicorn --factory ecomm_asgi:create_asgi_app --workers 4
+#
+# Needs asgiref plus an async driver: aiomysql for MySQL, aiosqlite for SQLite.
+
+logger = logging.getLogger('ecomm_api')
+
+ASYNC_DRIVERS = {
+    'mysql+mysqlconnector': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'mysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+def async_database_uri(uri):
+    scheme, rest = uri.split('://', 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+# Endpoints that conditional_jsonify serves with strong ETags on the Flask side
+CONDITIONAL_ENDPOINTS = {'get_product', 'get_products'}
+
+
+class NotFound(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+class AsyncReadAPI:
+    def __init__(self, flask_app, engine):
+        self.flask_app = flask_app
+        self.engine = engine
+        self.sessions = async_sessionmaker(engine, expire_on_commit=False)
+        self.fallback = WsgiToAsgi(flask_app)
+        self.routes = [
+            (re.compile(r'/products/(\d+)'), 'get_product', self.get_product),
+            (re.compile(r'/products'), 'get_products', self.get_products),
+            (re.compile(r'/orders/(\d+)/status'), 'track_order', self.track_order),
+            (re.compile(r'/customers/(\d+)/orders'), 'get_order_history', self.get_order_history),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            for pattern, endpoint, handler in self.routes:
+                match = pattern.fullmatch(scope['path'])
+                if match:
+                    await self.dispatch(scope, send, endpoint, handler, [int(group) for group in match.groups()])
+                    return
+        await self.fallback(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def dispatch(self, scope, send, endpoint, handler, path_args):
+        started = time.perf_counter()
+        metrics = self.flask_app.extensions['request_metrics']
+        metrics.started(endpoint)
+        status = 500
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        request_id = headers.get('x-request-id') or uuid.uuid4().hex
+        try:
+            args = dict(parse_qsl(scope['query_string'].decode('latin-1')))
+            try:
+                status, data = 200, await handler(args, *path_args)
+            except NotFound:
+                status, data = 404, {"message": "Not found"}
+            except BadRequest as err:
+                status, data = 400, {"message": str(err)}
+            except Exception:
+                logger.exception("request_id=%s route=ecomm.%s failed", request_id, endpoint)
+                status, data = 500, {"message": "Internal server error"}
+
+            # Serialized exactly as jsonify does, so bodies and ETags match the sync path
+            body = (self.flask_app.json.dumps(data, separators=(',', ':')) + '\n').encode()
+            response_headers = [(b'content-type', b'application/json'), (b'x-request-id', request_id.encode())]
+            if status == 200 and endpoint in CONDITIONAL_ENDPOINTS:
+                etag = generate_etag(body)
+                response_headers.append((b'etag', f'"{etag}"'.encode()))
+                if parse_etags(headers.get('if-none-match')).contains(etag):
+                    status, body = 304, b''
+            response_headers.append((b'content-length', str(len(body)).encode()))
+
+            await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+            await send({'type': 'http.response.body', 'body': body if scope['method'] == 'GET' else b''})
+        finally:
+            metrics.finished(endpoint, status, time.perf_counter() - started)
+        level = request_log_level(self.flask_app.config, f'ecomm.{endpoint}', status)
+        if level is not None and logger.isEnabledFor(level):
+            logger.log(level, "request_id=%s route=ecomm.%s method=%s path=%s status=%d latency_ms=%.2f async=1",
+                       request_id, endpoint, scope['method'], scope['path'], status,
+                       (time.perf_counter() - started) * 1000)
+
+    async def get_product(self, args, id):
+        cache = self.flask_app.extensions['product_cache']
+        product = cache.get(id)
+        if product is None:
+            async with self.sessions() as session:
+                instance = await session.get(Product, id)
+            if instance is None:
+                raise NotFound()
+            product = product_schema.dump(instance)
+            cache.set(id, product)
+        return product
+
+    async def get_products(self, args):
+        try:
+            statement, limit, sort = products_page_statement(args)
+        except ValueError as err:
+            raise BadRequest(str(err))
+        async with self.sessions() as session:
+            products = (await session.execute(statement)).scalars().all()
+        return products_page(products, limit, sort)
+
+    async def track_order(self, args, id):
+        async with self.sessions() as session:
+            order = await session.get(Order, id)
+        if order is None:
+            raise NotFound()
+        return order_status(order)
+
+    async def get_order_history(self, args, customer_id):
+        async with self.sessions() as session:
+            if await session.get(Customer, customer_id) is None:
+                raise NotFound()
+            try:
+                statement, limit = order_history_statement(customer_id, args)
+            except ValueError as err:
+                raise BadRequest(str(err))
+            orders = (await session.execute(statement)).scalars().all()
+        return order_history_page(orders, limit)
+
+
+def create_asgi_app(config=None):
+    flask_app = create_app(config)
+    uri = flask_app.config['ASYNC_DATABASE_URI'] or async_database_uri(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+    # A pool of its own, sized apart from the sync engine's, which still serves every other route
+    engine_options = dict(flask_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    if 'pool_size' in engine_options:
+        engine_options['pool_size'] = flask_app.config['ASYNC_DB_POOL_SIZE']
+        engine_options['max_overflow'] = flask_app.config['ASYNC_DB_MAX_OVERFLOW']
+    engine = create_async_engine(uri, **engine_options)
+    return AsyncReadAPI(flask_app, engine)
@@ -0,0 +1,104 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+from datetime import date
+
+from ecomm_api import Customer, Product, create_app, db
+
+# Hammers POST /orders from many threads against one low-stock product set and checks
+# that stock never goes negative and every unit sold belongs to an accepted order.
+#
+#   python stress_orders.py --threads 32 --orders 2000 --products 5 --stock 100
+#   python stress_orders.py --database-url mysql+mysqlconnector://root:pw@localhost/ecomm_stress --reset
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Concurrent order placement stress test")
+    parser.add_argument('--database-url', help="defaults to a throwaway SQLite file")
+    parser.add_argument('--reset', action='store_true',
+                        help="allow dropping and recreating every table in --database-url")
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--orders', type=int, default=1000, help="total orders attempted")
+    parser.add_argument('--products', type=int, default=3)
+    parser.add_argument('--stock', type=int, default=100, help="starting stock per product")
+    parser.add_argument('--max-quantity', type=int, default=3)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url
+    if database_url and not args.reset:
+        sys.exit("Refusing to drop the tables in --database-url; pass --reset if that database is disposable")
+    if not database_url:
+        database_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'stress.db')
+
+    config = {'SQLALCHEMY_DATABASE_URI': database_url, 'LOG_LEVEL': 'WARNING',
+              'DB_POOL_SIZE': args.threads, 'DB_MAX_OVERFLOW': 0}
+    if database_url.startswith('sqlite'):
+        # SQLite serializes writers; wait on its lock instead of failing fast
+        config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 60}, 'pool_size': args.threads}
+    app = create_app(config)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        customer = Customer(name="Stress Test", email="stress@example.com", phone="0")
+        db.session.add(customer)
+        db.session.add_all([Product(name=f"Product {n}", price=1.0, stock=args.stock)
+                            for n in range(args.products)])
+        db.session.commit()
+        customer_id = customer.id
+        product_ids = [product_id for (product_id,) in db.session.query(Product.id)]
+
+    results = {'placed': 0, 'rejected': 0, 'failed': 0, 'units_sold': {product_id: 0 for product_id in product_ids}}
+    lock = threading.Lock()
+    remaining = iter(range(args.orders))
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            basket = random.sample(product_ids, random.randint(1, len(product_ids)))
+            items = [{'product_id': product_id, 'quantity': random.randint(1, args.max_quantity)}
+                     for product_id in basket]
+            response = client.post('/orders', json={'customer_id': customer_id,
+                                                    'date': date.today().isoformat(),
+                                                    'items': items})
+            with lock:
+                if response.status_code == 201:
+                    results['placed'] += 1
+                    for item in items:
+                        results['units_sold'][item['product_id']] += item['quantity']
+                elif response.status_code == 409:
+                    results['rejected'] += 1
+                else:
+                    results['failed'] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        stock = dict(db.session.query(Product.id, Product.stock))
+
+    ok = results['failed'] == 0
+    for product_id in product_ids:
+        expected = args.stock - results['units_sold'][product_id]
+        status = "ok" if stock[product_id] == expected and stock[product_id] >= 0 else "MISMATCH"
+        ok = ok and status == "ok"
+        print(f"product {product_id}: sold {results['units_sold'][product_id]}, "
+              f"stock {stock[product_id]} (expected {expected}) {status}")
+    print(f"placed {results['placed']}, rejected for stock {results['rejected']}, failed {results['failed']}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,11 @@
+import pytest
+
+from ecomm_api import create_app, db
+
+
+@pytest.fixture
+def client():
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'LOG_LEVEL': 'WARNING'})
+    with app.app_context():
+        db.create_all()
+    return app.test_client()
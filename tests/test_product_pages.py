@@ -0,0 +1,24 @@
+import pytest
+
+
+def page_through(client, **params):
+    ids, after = [], None
+    while True:
+        query = dict(params, limit=2, **({'after': after} if after else {}))
+        response = client.get('/products', query_string=query)
+        assert response.status_code == 200
+        ids += [product['id'] for product in response.json['products']]
+        after = response.json['next_cursor']
+        if after is None:
+            return ids
+
+
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_tied_prices_page_through_every_product_once(client, order):
+    prices = {}
+    for price in [19.99, 5.1, 19.99, 19.99, 5.1, 0.3, 19.99]:
+        response = client.post('/products', json={'name': "Tied", 'price': price})
+        assert response.status_code == 201
+        prices[response.json['id']] = price
+    expected = sorted(prices, key=lambda id: (prices[id], id), reverse=order == 'desc')
+    assert page_through(client, sort='price', order=order) == expected
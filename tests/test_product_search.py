@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from ecomm_api import ProductSearchIndex, create_app, db, product_changes, reload_search_index, search_index
+
+NAMES = ["Red Widget", "Blue Widget", "Red Widget Large", "Widgets Box", "Green Gadget", "Red Wide Lamp"]
+
+
+def loaded_index(names=NAMES, index=None):
+    index = index or ProductSearchIndex()
+    index.load(enumerate(names, start=1))
+    return index
+
+
+def test_whole_word_matches_rank_before_prefix_matches_then_shorter_names():
+    index = loaded_index()
+    assert index.search("widget", 0, 10) == [1, 2, 3, 4]
+    assert index.search("red wid", 0, 10) == [1, 3, 6]
+    assert index.search("red wid", 1, 1) == [3]
+    assert index.search("purple", 0, 10) == []
+
+
+def test_updates_and_deletes_are_searchable_at_once():
+    index = loaded_index()
+    index.update(upserted=[(2, "Blue Sprocket"), (7, "Red Widget Mini")], deleted=[1])
+    assert index.search("widget", 0, 10) == [3, 7, 4]
+    assert index.search("spro", 0, 10) == [2]
+    index.update(deleted=[2, 99])
+    assert index.search("spro", 0, 10) == []
+
+
+def test_complete_replaces_misspelled_words_with_the_closest_ones():
+    index = loaded_index()
+    assert index.complete("widgte", 10) == [(1, "Red Widget"), (2, "Blue Widget"), (3, "Red Widget Large"),
+                                            (4, "Widgets Box"), (6, "Red Wide Lamp")]
+    assert index.complete("widgte", 2) == [(1, "Red Widget"), (2, "Blue Widget")]
+    assert index.complete("gren gad", 10) == [(5, "Green Gadget")]
+    assert index.complete("zzzz", 10) == []
+
+
+class BitmapIndex(ProductSearchIndex):
+    WALK_LIMIT = 4
+    BITMAP_SHARE = 64
+
+
+def test_bitmap_intersections_match_walking_the_postings():
+    rng = random.Random(7)
+    words = ["red", "blue", "steel", "lamp", "chair", "model", "mini"]
+    names = [f"{rng.choice(words)} {rng.choice(words)} {rng.randint(1, 300)}" for _ in range(400)]
+    walked = loaded_index(names)
+    intersected = loaded_index(names, BitmapIndex())
+    assert intersected._word_bits and intersected._prefix_bits
+    for step in range(50):
+        product_id = rng.randint(1, 420)
+        if step % 3:
+            name = f"{rng.choice(words)} {rng.choice(words)} {rng.randint(1, 300)}"
+            walked.update(upserted=[(product_id, name)])
+            intersected.update(upserted=[(product_id, name)])
+        else:
+            walked.update(deleted=[product_id])
+            intersected.update(deleted=[product_id])
+        for query in ["red 1", "red steel 2", "lamp chair 9", "model 12", "mini m", "blue"]:
+            assert intersected.search(query, 0, 15) == walked.search(query, 0, 15)
+            assert intersected.search(query, 10, 10) == walked.search(query, 10, 10)
+
+
+@pytest.fixture
+def workers(tmp_path):
+    config = {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'shop.db'}", 'LOG_LEVEL': 'WARNING',
+              'PRODUCT_INDEX_REFRESH': 0}
+    first, second = create_app(config), create_app(config)
+    with first.app_context():
+        db.create_all()
+    return first.test_client(), second.test_client()
+
+
+def suggestions(client, q):
+    response = client.get('/products/autocomplete', query_string={'q': q})
+    assert response.status_code == 200
+    return [suggestion['name'] for suggestion in response.json['suggestions']]
+
+
+def test_writes_through_one_worker_reach_the_other_workers_index(workers):
+    first, second = workers
+    for name in ["Red Widget", "Blue Widget"]:
+        assert first.post('/products', json={'name': name, 'price': 1}).status_code == 201
+    assert suggestions(second, "wid") == ["Red Widget", "Blue Widget"]
+
+    first.put('/products/1', json={'name': "Red Sprocket", 'price': 1, 'stock': 0})
+    first.delete('/products/2')
+    first.post('/import/products', data='{"name": "Green Widget", "price": 2}\n',
+               content_type='application/x-ndjson')
+    assert suggestions(second, "wid") == ["Green Widget"]
+    assert suggestions(second, "spro") == ["Red Sprocket"]
+
+
+def test_a_rebuild_prunes_the_change_log_the_previous_one_covered(workers):
+    first, _ = workers
+    first.post('/products', json={'name': "Red Widget", 'price': 1})
+    for name in ["Red Lamp", "Red Chair", "Red Stool"]:
+        first.put('/products/1', json={'name': name, 'price': 1, 'stock': 0})
+    app = first.application
+    with app.app_context():
+        index = search_index()
+        for _ in range(2):
+            index.refresh_lock.acquire()
+            reload_search_index(index)
+            with index.refresh_lock:
+                pass
+        assert [id for (id,) in db.session.execute(db.select(product_changes.c.id))] == [3]
+    assert suggestions(first, "sto") == ["Red Stool"]
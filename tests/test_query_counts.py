@@ -0,0 +1,44 @@
+import re
+from datetime import date
+
+import pytest
+
+from ecomm_api import Customer, Order, OrderLine, Product, db
+
+
+def seed_customer(client, order_count):
+    with client.application.app_context():
+        customer = Customer(name="Query Count", email="count@example.com", phone="0")
+        products = [Product(name=f"Product {n}", price=1.5, stock=10) for n in range(3)]
+        db.session.add(customer)
+        db.session.add_all(products)
+        db.session.flush()
+        orders = [Order(date=date(2024, 1, 1 + n % 28), customer_id=customer.id, total=4.5)
+                  for n in range(order_count)]
+        db.session.add_all(orders)
+        db.session.flush()
+        db.session.execute(db.insert(OrderLine), [
+            {'order_id': order.id, 'product_id': product.id, 'quantity': 1, 'unit_price': 1.5}
+            for order in orders for product in products])
+        db.session.commit()
+        return customer.id
+
+
+def query_count(response):
+    assert response.status_code == 200
+    return int(re.search(r'queries;desc="(\d+)"', response.headers['Server-Timing']).group(1))
+
+
+@pytest.mark.parametrize('path', ['/customers/{id}', '/customers/{id}/orders'])
+def test_query_count_does_not_grow_with_orders(client, path):
+    few = seed_customer(client, 2)
+    many = seed_customer(client, 40)
+    assert query_count(client.get(path.format(id=many))) == query_count(client.get(path.format(id=few)))
+    assert query_count(client.get(path.format(id=many))) <= 5
+
+
+def test_unmatched_requests_are_recorded_under_their_own_key(client):
+    assert client.get('/no/such/route').status_code == 404
+    response = client.get('/metrics/queries')
+    assert response.status_code == 200
+    assert response.json['unmatched']['requests'] == 1